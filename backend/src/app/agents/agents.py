@@ -11,12 +11,12 @@ class Agent(ABC):
     """
     
     @abstractmethod
-    def chat(self, message: str) -> str:
+    async def chat(self, message: str) -> str:
         """Process a user message and return the agent's response.
-        
+
         Args:
             message: The user's input message
-            
+
         Returns:
             str: The agent's response to the message
         """
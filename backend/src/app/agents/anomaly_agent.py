@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import Optional, Dict, Any
+import asyncio
 import os
 
 from langchain_openai import ChatOpenAI
@@ -10,7 +11,7 @@ from functools import partial
 
 from agents.agents import Agent
 from core.session_store import SessionStore
-from service.llm_router import infer_message_types_llm, refine_types_with_llm
+from service.llm_router import infer_and_refine
 from service.summariser import build_context
 from models.telemetry_data import TelemetryData
 import logging
@@ -36,7 +37,7 @@ class AnomalyAgent(Agent):
             return_messages=True
         )
 
-    def chat(self, message: str) -> str:
+    async def chat(self, message: str) -> str:
         """Process a user message about potential anomalies and return the response.
 
         Args:
@@ -59,9 +60,12 @@ class AnomalyAgent(Agent):
             logger.info(f"combined_query: {combined_query}")
 
             recent_msgs_tuple = tuple(recent_msgs_for_context)
-            raw_types = infer_message_types_llm(message, recent_msgs_tuple, frozenset(self.tdata.by_type.keys()))
-            logger.info(f"raw_types: {raw_types}")
-            msg_types = refine_types_with_llm(message, recent_msgs_tuple, list(raw_types))
+            msg_types = await infer_and_refine(
+                message,
+                recent_msgs_tuple,
+                frozenset(self.tdata.by_type.keys()),
+                self.session_store.get_last_msg_types(self.session_id),
+            )
             logger.info(f"msg_types: {msg_types}")
             self.session_store.set_last_msg_types(self.session_id, list(msg_types))
 
@@ -133,23 +137,25 @@ class AnomalyAgent(Agent):
 
         ctx_chunks = self.split_context_into_chunks(ctx, max_tokens=50000)
 
-        partial_answers = []
-        for chunk in ctx_chunks:
-            partial_msg = [
+        # Per-chunk analyses are independent — run them concurrently.
+        partial_msgs = [
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "system", "content": analysis_prompt},
                 *summary_msgs,
                 {"role": "user", "content": f"### Context\n{chunk}\n\n### Question\n{message}"}
             ]
-            partial_resp = self.llm.invoke(partial_msg)
-            partial_answers.append(partial_resp.content)
+            for chunk in ctx_chunks
+        ]
+        partial_resps = await asyncio.gather(*(self.llm.ainvoke(m) for m in partial_msgs))
+        partial_answers = [r.content for r in partial_resps]
 
         combined = "\n---\n".join(partial_answers)
         summary_prompt = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"Original question: {message}\n\nPartial analyses from telemetry slices:\n\n{combined}\n\nPlease merge and summarize the key insights as a final answer."}
         ]
-        final_resp = self.llm.invoke(summary_prompt)
+        final_resp = await self.llm.ainvoke(summary_prompt)
 
         self.memory.save_context({"input": message}, {"output": final_resp.content})
 
@@ -25,7 +25,7 @@ class FallbackAgent(Agent):
             "For unclear queries, ask clarifying questions to better understand what the user needs help with."
         ))
 
-    def chat(self, message: str) -> str:
+    async def chat(self, message: str) -> str:
         messages = [self.system_prompt]
         
         if self.session_store:
@@ -37,5 +37,5 @@ class FallbackAgent(Agent):
         
         messages.append(HumanMessage(content=message))
         
-        response = self.llm(messages)
+        response = await self.llm.ainvoke(messages)
         return response.content
\ No newline at end of file
@@ -22,7 +22,7 @@ class GreetingAgent(Agent):
             "If the conversation strays from flight logs, politely guide it back to UAV topics."
         ))
 
-    def chat(self, message: str) -> str:
+    async def chat(self, message: str) -> str:
         messages = [self.system_prompt]
         
         if self.session_store:
@@ -34,5 +34,5 @@ class GreetingAgent(Agent):
         
         messages.append(HumanMessage(content=message))
         
-        response = self.llm(messages)
+        response = await self.llm.ainvoke(messages)
         return response.content
\ No newline at end of file
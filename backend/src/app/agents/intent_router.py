@@ -3,26 +3,55 @@ from agents.greeting_agent import GreetingAgent
 from agents.telemetry_analysis_agent import TelemetryAnalysisAgent
 from agents.fallback_agent import FallbackAgent
 from agents.anomaly_agent import AnomalyAgent
-from langchain.schema import SystemMessage, HumanMessage
+import asyncio
+import functools
 import os
-import json
+import re
+import orjson
+from cachetools import TTLCache
 from core.session_store import SessionStore
+from service.semantic_cache import SemanticCache
 import logging
 
 logger = logging.getLogger(__name__)
 
-class IntentRouterAgent:
-    def __init__(self, session_id: str, store: SessionStore):
-        self.session_id = session_id
-        self.store = store
-        self.INTENT_TO_AGENT_MAP = {
-            "greeting": GreetingAgent(session_id, self.store),
-            "factual": TelemetryAnalysisAgent(self.store.get_telemetry(session_id), session_id, self.store),
-            "anomaly": AnomalyAgent(self.store.get_telemetry(session_id), session_id, self.store),
-            "clarification": TelemetryAnalysisAgent(self.store.get_telemetry(session_id), session_id, self.store),
-            "other": FallbackAgent(session_id, self.store)
-        }
-        self.INTENT_SYSTEM = SystemMessage(content=(
+# Shared classifier client: constructing ChatOpenAI per call re-reads config
+# and re-creates an httpx client + connection pool, so hoist it to module
+# scope and reuse the pool across requests.
+_INTENT_LLM = ChatOpenAI(
+    model="gpt-4o-mini",
+    temperature=0,
+    request_timeout=8,
+    openai_api_key=os.getenv("OPENAI_API_KEY"),
+)
+
+# Cap concurrent classifications so a burst of chats can't exhaust the shared
+# client's connection pool.
+_INTENT_SEM = asyncio.Semaphore(8)
+
+# Trivial greetings don't need a classification round trip at all — a
+# compiled regex match short-circuits the LLM entirely.
+_GREETING_RE = re.compile(
+    r"^\s*(hi|hello|hey|yo|thanks|thank you|bye|goodbye|see (ya|you))[\s!.?]*$",
+    re.IGNORECASE,
+)
+
+# Paraphrase cache: "what was the max altitude?" and "highest altitude
+# reached?" classify identically, so a near-duplicate question skips the LLM.
+# One SemanticCache per conversation state (hash of the folded-in history):
+# only the current message is embedded, so a long shared history block can't
+# dominate the vector and make two different follow-ups after the same
+# exchange collide, while different contexts still never share entries.
+_intent_caches: TTLCache = TTLCache(maxsize=256, ttl=3600)
+
+def _intent_cache_for(history_block: str) -> SemanticCache:
+    key = hash(history_block)
+    cache = _intent_caches.get(key)
+    if cache is None:
+        cache = _intent_caches.setdefault(key, SemanticCache())
+    return cache
+
+INTENT_SYSTEM_TEXT = (
             "You are an intent classifier for a UAV flight log assistant.\n\n"
             "Your task is to classify the intent behind the **current user message**, using both the message "
             "itself and the **preceding conversation history** for context.\n\n"
@@ -72,31 +101,112 @@ class IntentRouterAgent:
             "    - topic: (if intent is \"factual\" or \"exploratory\", summarize the main subject e.g., \"descent phase\", \"voltage drop\", etc.)\n\n"
             "Respond with only the JSON.\n"
             "Do not include any explanation or commentary."
-        )
-    )
+)
+
+# Built once at import: the classifier prefix never changes, so each call
+# reuses the same message dict instead of re-wrapping the ~3KB prompt.
+_INTENT_PREFIX_MSGS = [{"role": "system", "content": INTENT_SYSTEM_TEXT}]
+
+# Structured outputs: the model is constrained to this schema, so replies are
+# guaranteed-valid JSON with a correct intent label — no malformed-JSON
+# fallback round trip.
+_INTENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "intent",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "intent": {
+                    "type": "string",
+                    "enum": ["greeting", "factual", "anomaly", "clarification", "other"],
+                },
+                "follow_up_on": {"type": "string"},
+                "topic": {"type": "string"},
+            },
+            "required": ["intent", "follow_up_on", "topic"],
+            "additionalProperties": False,
+        },
+    },
+}
+
 
-    def classify_intent_llm(self, msg: str) -> str:
-        user = HumanMessage(content=msg)
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+class IntentRouterAgent:
+    def __init__(self, session_id: str, store: SessionStore):
+        self.session_id = session_id
+        self.store = store
+        self._tdata = store.get_telemetry(session_id)
+        # Agents are built lazily: a "hello" turn shouldn't pay for a
+        # TelemetryAnalysisAgent (LLM client + summary memory) it never uses.
+        # factual and clarification share the same instance.
+        self._agent_factories = {
+            "greeting": lambda: self._greeting_agent,
+            "factual": lambda: self._telemetry_agent,
+            "anomaly": lambda: self._anomaly_agent,
+            "clarification": lambda: self._telemetry_agent,
+            "other": lambda: self._fallback_agent,
+        }
+
+    @functools.cached_property
+    def _greeting_agent(self) -> GreetingAgent:
+        return GreetingAgent(self.session_id, self.store)
+
+    @functools.cached_property
+    def _telemetry_agent(self) -> TelemetryAnalysisAgent:
+        return TelemetryAnalysisAgent(self._tdata, self.session_id, self.store)
+
+    @functools.cached_property
+    def _anomaly_agent(self) -> AnomalyAgent:
+        return AnomalyAgent(self._tdata, self.session_id, self.store)
+
+    @functools.cached_property
+    def _fallback_agent(self) -> FallbackAgent:
+        return FallbackAgent(self.session_id, self.store)
+
+    async def classify_intent_llm(self, msg: str) -> str:
+        if _GREETING_RE.match(msg):
+            return {"intent": "greeting", "follow_up_on": "", "topic": ""}
+
+        # Keep INTENT_SYSTEM as the first, byte-identical message on every
+        # call so the provider's prompt prefix cache can hit; all dynamic
+        # content (history + current message) goes into one trailing user
+        # message instead of being interleaved as separate turns.
         history = self.store.get_history(self.session_id)[-2:]  # keeping it concise, no need to include long history
-        msgs = [self.INTENT_SYSTEM] + history + [user]
-        result = llm.invoke(msgs)
-        response = result.content.strip().lower()
+        content = msg
+        hist_block = ""
+        if history:
+            hist_block = "\n".join(f"{m['role']}: {m['content']}" for m in history)
+            content = f"Recent conversation:\n{hist_block}\n\nCurrent message: {msg}"
+        intent_cache = _intent_cache_for(hist_block)
+        cached, emb = await intent_cache.lookup(msg)
+        if cached is not None:
+            logger.info(f"Intent classification served from semantic cache: {cached}")
+            return cached
+
+        msgs = _INTENT_PREFIX_MSGS + [{"role": "user", "content": content}]
+        async with _INTENT_SEM:
+            result = await _INTENT_LLM.ainvoke(msgs, response_format=_INTENT_RESPONSE_FORMAT)
+        # No .lower(): lowercasing the whole reply corrupted string fields
+        # (e.g. proper nouns in follow_up_on) and the schema already pins the
+        # intent label casing.
+        response = result.content.strip()
         logger.info(f"Intent classification result: {response}")
         try:
-            parsed = json.loads(response)
+            parsed = orjson.loads(response)
+            await intent_cache.store(emb, parsed)
             return parsed
         except Exception as e:
             logger.error(f"Failed to parse intent JSON: {response} → {e}")
             return {"intent": "other", "follow_up_on": ""}
 
-    def classify_intent(self, user_msg: str) -> str:
-        intent = self.classify_intent_llm(user_msg)
+    async def classify_intent(self, user_msg: str) -> str:
+        intent = await self.classify_intent_llm(user_msg)
         self.store.set_intent(self.session_id, intent)
         return intent
 
-    def route(self, user_msg: str) -> str:
-        parsed = self.classify_intent_llm(user_msg)
+    async def route(self, user_msg: str) -> str:
+        parsed = await self.classify_intent_llm(user_msg)
         intent = parsed.get("intent", "other")
         follow_up_on = parsed.get("follow_up_on", "").strip()
 
@@ -105,5 +215,6 @@ class IntentRouterAgent:
             self.store.set_topic(self.session_id, follow_up_on)
 
         logger.info(f"classified intent: {intent}, topic: {follow_up_on}")
-        agent = self.INTENT_TO_AGENT_MAP.get(intent)
-        return agent.chat(user_msg) if agent else FallbackAgent(self.session_id, self.store).chat(user_msg)
\ No newline at end of file
+        factory = self._agent_factories.get(intent)
+        agent = factory() if factory else self._fallback_agent
+        return await agent.chat(user_msg)
\ No newline at end of file
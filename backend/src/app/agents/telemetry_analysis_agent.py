@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import Optional
+import asyncio
 import os
 
 from langchain_openai import ChatOpenAI
@@ -7,7 +8,7 @@ from langchain.memory import ConversationSummaryBufferMemory
 
 from agents.agents import Agent
 from core.session_store import SessionStore
-from service.llm_router import infer_message_types_llm, refine_types_with_llm
+from service.llm_router import infer_and_refine
 from service.summariser import build_context
 from models.telemetry_data import TelemetryData
 import logging
@@ -32,7 +33,7 @@ class TelemetryAnalysisAgent(Agent):
             return_messages=True
         )
 
-    def chat(self, message: str) -> str:
+    async def chat(self, message: str) -> str:
         """Process a user message and return the response.
         
         Args:
@@ -59,9 +60,12 @@ class TelemetryAnalysisAgent(Agent):
             logger.info(f"[infer] combined_query: {combined_query}")
 
             recent_msgs_tuple = tuple(recent_msgs_for_context)
-            raw_types = infer_message_types_llm(message, recent_msgs_tuple, frozenset(self.tdata.by_type.keys()))
-            logger.info(f"raw_types: {raw_types}")
-            msg_types = refine_types_with_llm(message, recent_msgs_tuple, list(raw_types))
+            msg_types = await infer_and_refine(
+                message,
+                recent_msgs_tuple,
+                frozenset(self.tdata.by_type.keys()),
+                self.session_store.get_last_msg_types(self.session_id),
+            )
             logger.info(f"msg_types: {msg_types}")
             self.session_store.set_last_msg_types(self.session_id, list(msg_types))
 
@@ -134,17 +138,19 @@ class TelemetryAnalysisAgent(Agent):
 
         ctx_chunks = self.split_context_into_chunks(ctx, max_tokens=40000)
 
-        partial_answers = []
-        for chunk in ctx_chunks:
-            partial_msg = [
+        # Per-chunk analyses are independent — fire them concurrently so the
+        # round trips overlap instead of paying one RTT per chunk.
+        partial_msgs = [
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "system", "content": analysis_prompt},
                 *summary_msgs,  # if memory is light
                 {"role": "user", "content": f"### Context\n{chunk}\n\n### Question\n{message}"}
             ]
-            partial_resp = self.llm.invoke(partial_msg)
-            partial_answers.append(partial_resp.content)
-
+            for chunk in ctx_chunks
+        ]
+        partial_resps = await asyncio.gather(*(self.llm.ainvoke(m) for m in partial_msgs))
+        partial_answers = [r.content for r in partial_resps]
 
         # Final aggregation step
         combined = "\n---\n".join(partial_answers)
@@ -152,7 +158,7 @@ class TelemetryAnalysisAgent(Agent):
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"Original question: {message}\n\n Here are partial analyses from multiple telemetry slices:\n\n{combined}\n\nPlease merge and summarize the key insights, as if answering the original question."}
         ]
-        final_resp = self.llm.invoke(summary_prompt)
+        final_resp = await self.llm.ainvoke(summary_prompt)
 
         # save turn to session store
         self.memory.save_context({"input": message}, {"output": final_resp.content})
@@ -65,7 +65,7 @@ async def chat(req: ChatRequest):
             detail="No file has been uploaded for this session. Please upload a file first."
         )
     router = IntentRouterAgent(req.session_id, store)
-    answer = router.route(req.message)
+    answer = await router.route(req.message)
     logger.info(f"Chat response: {answer}")
     return ChatResponse(answer=answer)
 
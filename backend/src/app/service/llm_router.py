@@ -4,16 +4,70 @@ MAVLink message types (strings) that the analysis layer should include
 in the context.  Uses OpenAI function-calling for structured output.
 """
 
+import asyncio
+import logging
 from functools import lru_cache
-from typing import FrozenSet, Set
+from typing import FrozenSet, Iterable, Optional, Set
 import os
 
-from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
+import aiohttp
+import orjson
+from cachetools import TTLCache
 
-_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, request_timeout=8, openai_api_key=os.getenv("OPENAI_API_KEY"))
+from service.keyword_router import infer_message_types as infer_message_types_kw
+from service.semantic_cache import SemanticCache
 
-def make_func_spec(supported_types: Set[str]) -> dict:
+logger = logging.getLogger(__name__)
+
+_OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+_MODEL = "gpt-4o-mini"
+_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=8)
+
+# Shared aiohttp session so concurrent LLM calls reuse one connection pool.
+# Created lazily: aiohttp sessions must be built inside a running event loop.
+_http_session: Optional[aiohttp.ClientSession] = None
+
+def _get_session() -> aiohttp.ClientSession:
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
+        )
+    return _http_session
+
+# Retry parity with the openai client this replaced (max_retries=2): rate
+# limits and transient server errors back off instead of surfacing as a 500,
+# which matters now that per-chunk and speculative calls burst concurrently.
+_MAX_RETRIES = 2
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+async def _chat_completion(messages: list[dict], **extra) -> dict:
+    """POST to the chat completions endpoint and return the reply message dict.
+
+    Talking to the API directly (plain message dicts over aiohttp) avoids the
+    per-call LangChain message objects and schema conversion on this hot path.
+    429/5xx responses are retried twice with exponential backoff.
+    """
+    body = orjson.dumps({"model": _MODEL, "temperature": 0, "messages": messages, **extra})
+    headers = {
+        "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
+        "Content-Type": "application/json",
+    }
+    for attempt in range(_MAX_RETRIES + 1):
+        async with _get_session().post(
+            _OPENAI_URL, data=body, headers=headers, timeout=_REQUEST_TIMEOUT
+        ) as r:
+            if r.status in _RETRYABLE_STATUS and attempt < _MAX_RETRIES:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            r.raise_for_status()
+            data = await r.json(loads=orjson.loads)
+            return data["choices"][0]["message"]
+
+@lru_cache(maxsize=8)
+def make_func_spec(supported_types: FrozenSet[str]) -> dict:
+    # The supported types are fixed per uploaded log, so the schema (and the
+    # sorted enum inside it) is built once per distinct type set.
     return {
         "name": "select_log_types",
         "description": (
@@ -33,8 +87,9 @@ def make_func_spec(supported_types: Set[str]) -> dict:
         },
     }
 
-SYSTEM = SystemMessage(
-    content=(
+SYSTEM = {
+    "role": "system",
+    "content": (
         "You are Falcon-Router, an expert in ArduPilot flight log telemetry. "
         "Your job is to select the *smallest* set of MAVLink message types "
         "based on the user's current question and recent conversation context. "
@@ -45,11 +100,12 @@ SYSTEM = SystemMessage(
         "Reference this documentation for message definitions:\n"
         "▸ https://ardupilot.org/plane/docs/logmessages.html\n\n"
         "Only include message types that are likely relevant — prefer precision over recall."
-    )
-)
+    ),
+}
 
-REFINER_SYSTEM = SystemMessage(
-    content=(
+REFINER_SYSTEM = {
+    "role": "system",
+    "content": (
         "You are a MAVLink log message filter. Your job is to refine a set of message types "
         "suggested by another AI, removing any that are irrelevant, redundant, or noisy.\n\n"
         "Do not introduce new message types. You must only select from the provided list.\n\n"
@@ -58,11 +114,30 @@ REFINER_SYSTEM = SystemMessage(
         "This link is to help you understand the meaning of fields — not to invent message types "
         "not present in the input list.\n\n"
         "Return the **minimal set** of message types most likely to help answer the user’s question."
-    )
-)
+    ),
+}
+
+# Exact-match cache, checked manually (decorators like lru_cache don't work
+# on coroutines — they'd cache the coroutine object, awaitable only once).
+# Keyed on the normalized question + available types only: including the
+# rolling recent_user_msgs in the key made the hit rate near zero while still
+# pinning every result in memory. Entries expire after an hour.
+_infer_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
 
-@lru_cache(maxsize=256)
-def infer_message_types_llm(question: str, recent_user_msgs: tuple[str, ...], types: FrozenSet[str]) -> Set[str]:
+# Second-level paraphrase cache: hits when the question is a reworded
+# duplicate that misses the exact-match cache above. One SemanticCache per
+# available-type set: only the question text is embedded, so a long shared
+# type list can't dominate the vector and let two different questions about
+# the same log clear the similarity threshold.
+_semantic_caches: TTLCache = TTLCache(maxsize=32, ttl=3600)
+
+def _semantic_cache_for(types: FrozenSet[str]) -> SemanticCache:
+    cache = _semantic_caches.get(types)
+    if cache is None:
+        cache = _semantic_caches.setdefault(types, SemanticCache())
+    return cache
+
+async def infer_message_types_llm(question: str, recent_user_msgs: tuple[str, ...], types: FrozenSet[str]) -> Set[str]:
     """Determine relevant MAVLink message types for a given question and context.
     
     Args:
@@ -73,38 +148,129 @@ def infer_message_types_llm(question: str, recent_user_msgs: tuple[str, ...], ty
     Returns:
         Set of selected message types or {"ERR"} if none selected or error occurred
     """
+    key = (question.lower().strip(), types)
+    hit = _infer_cache.get(key)
+    if hit is not None:
+        return hit
+
+    semantic_cache = _semantic_cache_for(types)
+    cached, emb = await semantic_cache.lookup(question)
+    if cached is not None:
+        return cached
+
     # Include recent messages as context if available
     context = ""
     if recent_user_msgs:
         context = "\n\nRecent conversation context (for reference only, focus on the current question):\n"
         context += "\n".join(f"- {msg}" for msg in recent_user_msgs[-2:])  # Limit to last 2 messages
-    
-    user = HumanMessage(content=f"Current question: {question}{context}")
-    resp = _llm(messages=[SYSTEM, user], functions=[make_func_spec(types)])
 
-    if resp.additional_kwargs.get("function_call"):
-        import json
-        payload = json.loads(resp.additional_kwargs["function_call"]["arguments"])
-        selected = set(payload.get("message_types", [])) & types
-        return selected or {"ERR"}
-    return {"ERR"}
+    user = {"role": "user", "content": f"Current question: {question}{context}"}
+    reply = await _chat_completion(
+        [SYSTEM, user],
+        functions=[make_func_spec(types)],
+        function_call={"name": "select_log_types"},
+    )
+
+    selected = {"ERR"}
+    if reply.get("function_call"):
+        payload = orjson.loads(reply["function_call"]["arguments"])
+        selected = (set(payload.get("message_types", [])) & types) or {"ERR"}
+
+    # Never cache the {"ERR"} failure sentinel: with the shared
+    # question+types key (and the paraphrase cache on top) one failed call
+    # would pin "no types found" for every session on this log until the TTL
+    # expires. Let failures retry on the next turn instead.
+    if selected != {"ERR"}:
+        _infer_cache[key] = selected
+        await semantic_cache.store(emb, selected)
+    return selected
 
 
-def refine_types_with_llm(question: str, recent_user_msgs: tuple[str, ...], raw_types: list[str]) -> set[str]:
+async def refine_types_with_llm(question: str, recent_user_msgs: tuple[str, ...], raw_types: list[str]) -> set[str]:
     # Include recent messages as context if available
     context = ""
     if recent_user_msgs:
         context = "\n\nRecent conversation context (for reference only, focus on the current question):\n"
         context += "\n".join(f"- {msg}" for msg in recent_user_msgs[-2:])  # Limit to last 3 messages
     
-    user = HumanMessage(content=(
+    user = {"role": "user", "content": (
         f"Original question: {question}{context}\n\n"
         f"Candidate types: {', '.join(sorted(raw_types))}\n\n"
         "Return the refined list of message types that are *most relevant* and *minimally sufficient* "
         "to answer the current question. Focus primarily on the current question and only use recent messages "
         "if they provide necessary context. Respond ONLY with a comma-separated list (no commentary)."
-    ))
-    resp = _llm(messages=[REFINER_SYSTEM, user])
-    if resp.content:
-        return set(t.strip() for t in resp.content.split(",") if t.strip())
-    return set(raw_types)
\ No newline at end of file
+    )}
+    reply = await _chat_completion([REFINER_SYSTEM, user])
+    content = reply.get("content")
+    if content:
+        return set(t.strip() for t in content.split(",") if t.strip())
+    return set(raw_types)
+
+
+# Feature flag: speculation spends an extra paid LLM call per turn, so it can
+# be switched off (SPECULATIVE_REFINE=0) to fall back to serial infer→refine.
+_SPECULATIVE_REFINE = os.getenv("SPECULATIVE_REFINE", "1").lower() not in ("0", "false")
+
+# Running hit-rate counters, logged on every resolution so the speculation
+# can be judged against the extra call it costs.
+_spec_stats = {"hit": 0, "miss": 0, "skipped": 0}
+
+def _log_spec_task_failure(task: "asyncio.Task") -> None:
+    """Done-callback: always retrieve the speculative task's outcome.
+
+    Without this, a task that already failed when we cancel()/abandon it
+    keeps an unretrieved exception and asyncio logs 'Task exception was
+    never retrieved' at GC time.
+    """
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc:
+        logger.warning(f"Speculative refine failed: {exc}")
+
+async def infer_and_refine(
+    question: str,
+    recent_user_msgs: tuple[str, ...],
+    types: FrozenSet[str],
+    last_msg_types: Optional[Iterable[str]] = None,
+) -> Set[str]:
+    """Infer message types and refine them, overlapping the two round trips.
+
+    The refine call is fired speculatively against a heuristic candidate set
+    (keyword hits + the previous turn's types) while infer runs. If infer
+    comes back a superset of what the speculative refine selected, that
+    result is already valid and the second serial round trip is hidden
+    entirely; otherwise we re-refine against infer's actual output. Small
+    inferred sets skip refinement — they are already minimal.
+    """
+    kw_hits = infer_message_types_kw(question)
+    if kw_hits == {"ERR"}:  # keyword router's no-match fallback, not a real hit
+        kw_hits = set()
+    candidates = (kw_hits | set(last_msg_types or ())) & types
+    infer_task = asyncio.ensure_future(infer_message_types_llm(question, recent_user_msgs, types))
+    spec_task = None
+    if _SPECULATIVE_REFINE and candidates:
+        spec_task = asyncio.ensure_future(
+            refine_types_with_llm(question, recent_user_msgs, sorted(candidates))
+        )
+        spec_task.add_done_callback(_log_spec_task_failure)
+
+    raw = await infer_task
+    if len(raw) <= 2:
+        if spec_task:
+            spec_task.cancel()
+            _spec_stats["skipped"] += 1
+        return raw
+
+    if spec_task:
+        try:
+            refined = await spec_task
+        except Exception:
+            refined = set()
+        if refined and refined <= raw:
+            _spec_stats["hit"] += 1
+            logger.info(f"Speculative refine hit ({_spec_stats})")
+            return refined
+        _spec_stats["miss"] += 1
+        logger.info(f"Speculative refine miss, re-refining ({_spec_stats})")
+    return await refine_types_with_llm(question, recent_user_msgs, list(raw))
\ No newline at end of file
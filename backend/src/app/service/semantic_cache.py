@@ -0,0 +1,89 @@
+"""
+Semantic response cache: embeds the lookup text and returns a previously
+stored result when a prior entry is cosine-similar above a threshold.
+Lets paraphrased questions ("max altitude?" / "highest altitude reached?")
+skip a full LLM round trip.
+"""
+
+from __future__ import annotations
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from openai import AsyncOpenAI
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_EMBED_MODEL = "text-embedding-3-small"
+
+_embed_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+class SemanticCache:
+    """Cosine-similarity cache over normalized embedding vectors.
+
+    Entries expire after ``ttl`` seconds and the cache holds at most
+    ``maxsize`` entries (oldest evicted first). Vectors are kept in a single
+    float32 matrix so a lookup is one matrix-vector product.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = 512, ttl: float = 3600.0):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._vectors: Optional[np.ndarray] = None  # (n, dim) float32, rows normalized
+        self._results: list = []
+        self._timestamps: deque = deque()
+        self._lock = asyncio.Lock()
+
+    async def _embed(self, text: str) -> np.ndarray:
+        resp = await _embed_client.embeddings.create(model=_EMBED_MODEL, input=text)
+        vec = np.asarray(resp.data[0].embedding, dtype=np.float32)
+        return vec / np.linalg.norm(vec)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = 0
+        while self._timestamps and now - self._timestamps[0] > self.ttl:
+            self._timestamps.popleft()
+            expired += 1
+        if expired:
+            self._vectors = self._vectors[expired:]
+            del self._results[:expired]
+            if not self._results:
+                self._vectors = None
+
+    async def lookup(self, text: str) -> Tuple[Optional[Any], Optional[np.ndarray]]:
+        """Return (cached_result, embedding). Result is None on miss; the
+        embedding is returned so a subsequent store() doesn't re-embed."""
+        try:
+            emb = await self._embed(text)
+        except Exception as e:
+            logger.warning(f"Semantic cache embed failed, bypassing cache: {e}")
+            return None, None
+        async with self._lock:
+            self._prune()
+            if self._results:
+                scores = self._vectors @ emb
+                best = int(scores.argmax())
+                if scores[best] > self.threshold:
+                    return self._results[best], emb
+        return None, emb
+
+    async def store(self, emb: Optional[np.ndarray], result: Any) -> None:
+        if emb is None:  # embedding failed earlier — nothing to index
+            return
+        async with self._lock:
+            if len(self._results) >= self.maxsize:
+                self._vectors = self._vectors[1:]
+                del self._results[0]
+                self._timestamps.popleft()
+            row = emb[None, :]
+            self._vectors = row if self._vectors is None else np.concatenate([self._vectors, row])
+            self._results.append(result)
+            self._timestamps.append(time.monotonic())
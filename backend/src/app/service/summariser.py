@@ -1,4 +1,10 @@
-import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import orjson
 import pandas as pd
 import logging
 
@@ -6,43 +12,195 @@ from core.session_store import SessionStore
 from models.telemetry_data import TelemetryData
 
 logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:  # pragma: no cover - numba is optional
+    _HAS_NUMBA = False
+
+# Only worth paying the JIT/compile overhead on genuinely large frames
+_NUMBA_MIN_ROWS = 50_000
+
+if _HAS_NUMBA:
+    # fastmath is deliberately off: the kernel relies on isnan checks, which
+    # fastmath's no-NaN assumption would break.
+    @njit(parallel=True, cache=True)
+    def _stats_kernel(arr):
+        nrows, ncols = arr.shape
+        counts = np.zeros(ncols, dtype=np.int64)
+        mins = np.empty(ncols)
+        maxs = np.empty(ncols)
+        means = np.empty(ncols)
+        stds = np.empty(ncols)
+        for j in prange(ncols):
+            # Welford's algorithm: single nan-aware pass per column
+            mean = 0.0
+            m2 = 0.0
+            cnt = 0
+            mn = np.inf
+            mx = -np.inf
+            for i in range(nrows):
+                v = arr[i, j]
+                if np.isnan(v):
+                    continue
+                cnt += 1
+                d = v - mean
+                mean += d / cnt
+                m2 += d * (v - mean)
+                if v < mn:
+                    mn = v
+                if v > mx:
+                    mx = v
+            counts[j] = cnt
+            if cnt:
+                means[j] = mean
+                stds[j] = np.sqrt(m2 / cnt)
+                mins[j] = mn
+                maxs[j] = mx
+            else:
+                means[j] = np.nan
+                stds[j] = np.nan
+                mins[j] = np.nan
+                maxs[j] = np.nan
+        return counts, mins, maxs, means, stds
+
 # -------------- helpers ----------------
-def _sample_df(df: pd.DataFrame, keep_rows: int = 100) -> str:
+
+# Optional per-msg_type allowlists of columns worth sending to the LLM;
+# types without an entry keep every column.
+_COLUMN_ALLOWLIST: dict[str, set[str]] = {}
+
+# Columns that never help the LLM (mavpackettype repeats the msg_type on
+# every single row)
+_DROP_COLS = {"mavpackettype"}
+
+# Float values are serialized with this many decimal digits — full 17-digit
+# reprs are pure prompt-token waste for telemetry readings
+_FLOAT_PRECISION = 4
+
+# GPS coordinates are the exception: 4 decimal places of latitude is ~11 m of
+# position error, which is useless for flight-path questions. 7 digits keeps
+# them to ~1 cm.
+_COORD_PRECISION = 7
+_COORD_COLS = {"Lat", "Lng", "Lon"}
+
+def _round_floats(df: pd.DataFrame) -> pd.DataFrame:
+    """Round float columns for serialization: _FLOAT_PRECISION digits, except
+    coordinate columns which keep _COORD_PRECISION."""
+    decimals = {
+        c: (_COORD_PRECISION if c in _COORD_COLS else _FLOAT_PRECISION)
+        for c in df.select_dtypes("float").columns
+    }
+    return df.round(decimals) if decimals else df
+
+def _prune_columns(df: pd.DataFrame, msg_type: Optional[str] = None) -> pd.DataFrame:
+    """Drop columns that don't earn their prompt tokens: the per-type
+    allowlist (when configured) and the always-useless _DROP_COLS."""
+    keep = _COLUMN_ALLOWLIST.get(msg_type)
+    cols = [c for c in df.columns if (keep is None or c in keep) and c not in _DROP_COLS]
+    return df[cols] if len(cols) != len(df.columns) else df
+
+def _sample_records(df: pd.DataFrame, keep_rows: int = 100) -> list[dict]:
     if len(df) <= keep_rows:
-        return df.to_json(orient="records")
+        return _round_floats(df).to_dict(orient="records")
     step = max(1, len(df) // keep_rows)
-    return df.iloc[::step].to_json(orient="records")
+    return _round_floats(df.iloc[::step]).to_dict(orient="records")
 
-def _describe_df(df: pd.DataFrame) -> str:
-    # only numeric columns
-    return json.dumps(df.describe().to_dict(), default=str)
+def _describe_df(df: pd.DataFrame) -> dict:
+    # only numeric columns; vectorized NumPy reductions are far cheaper than
+    # df.describe() and return native Python objects (no JSON round-trip)
+    num = df.select_dtypes("number")
+    if num.empty:
+        return {}
+    arr = num.to_numpy(dtype=np.float64)
+    with np.errstate(all="ignore"):
+        if _HAS_NUMBA and len(arr) >= _NUMBA_MIN_ROWS:
+            count, mins, maxs, means, stds = _stats_kernel(arr)
+        else:
+            count = np.count_nonzero(~np.isnan(arr), axis=0)
+            mins = np.nanmin(arr, axis=0)
+            maxs = np.nanmax(arr, axis=0)
+            means = np.nanmean(arr, axis=0)
+            stds = np.nanstd(arr, axis=0)
+        p25, p50, p75 = np.nanpercentile(arr, [25, 50, 75], axis=0)
+    return {
+        col: {
+            "count": int(count[i]),
+            "mean": means[i],
+            "std": stds[i],
+            "min": mins[i],
+            "p25": p25[i],
+            "p50": p50[i],
+            "p75": p75[i],
+            "max": maxs[i],
+        }
+        for i, col in enumerate(num.columns)
+    }
 
-def summarise_df(df: pd.DataFrame, max_rows: int = 10000) -> str:
+def summarise_df(df: pd.DataFrame, max_rows: int = 10000, msg_type: Optional[str] = None) -> str:
     n = len(df)
     logger.info(f"Summarising {n} rows")
-    if n <= 500:
-        return df.to_json(orient="records")
+    df = _prune_columns(df, msg_type)
+    # Below 900 rows the head/mid/tail windows would overlap; just send it all
+    if n < 900:
+        return _round_floats(df).to_json(orient="records", double_precision=_COORD_PRECISION)
 
     if n <= max_rows:
-        # Sample from start, middle, and end
-        head = df.head(300)
-        mid = df.iloc[n//2 - 150:n//2 + 150]
-        tail = df.tail(300)
-        merged = pd.concat([head, mid, tail]).drop_duplicates()
-        return merged.to_json(orient="records")
-
-    # For massive data: return hybrid of describe + sample
-    stats = _describe_df(df)
-    sample = _sample_df(df, keep_rows=300)
-    
-    return json.dumps({
-        "sample": json.loads(sample),
-        "summary": json.loads(stats),
+        # Sample from start, middle, and end. The windows are disjoint for
+        # n >= 900, so a single iloc replaces concat + drop_duplicates (which
+        # hashed every row across all columns)
+        idx = np.concatenate([
+            np.arange(300),
+            np.arange(n//2 - 150, n//2 + 150),
+            np.arange(n - 300, n),
+        ])
+        return _round_floats(df.iloc[idx]).to_json(orient="records", double_precision=_COORD_PRECISION)
+
+    # For massive data: return hybrid of describe + sample; built as plain
+    # Python objects and serialized exactly once
+    return orjson.dumps({
+        "sample": _sample_records(df, keep_rows=300),
+        "summary": _describe_df(df),
         "note": f"Sampled from {n} rows to fit context limits"
-    }, indent=2)
+    }, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+# Process-level summary cache keyed on (msg_type, content fingerprint):
+# summarise_df is pure, so re-uploads of the same log share summaries across
+# sessions instead of re-running the pandas→JSON work per session.
+_summary_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_summary_cache_lock = threading.Lock()
+_SUMMARY_CACHE_MAX = 512
+
+def _df_fingerprint(df: pd.DataFrame) -> Optional[int]:
+    """Cheap content fingerprint: row count + columns + value hash of the
+    first and last rows. Avoids hashing the full frame."""
+    try:
+        endpoints = pd.util.hash_pandas_object(df.iloc[[0, -1]], index=False).values
+        return hash((len(df), tuple(df.columns), endpoints.tobytes()))
+    except Exception:
+        return None
+
+def _summarise_cached(msg_type: str, df: pd.DataFrame) -> str:
+    fp = _df_fingerprint(df)
+    if fp is None:
+        return summarise_df(df, msg_type=msg_type)
+    key = (msg_type, fp)
+    with _summary_cache_lock:
+        hit = _summary_cache.get(key)
+        if hit is not None:
+            _summary_cache.move_to_end(key)
+            return hit
+    summary = summarise_df(df, msg_type=msg_type)
+    with _summary_cache_lock:
+        if len(_summary_cache) >= _SUMMARY_CACHE_MAX:
+            _summary_cache.popitem(last=False)
+        _summary_cache[key] = summary
+    return summary
 
 def build_context(tdata: TelemetryData, msg_types: set[str], session_id: str, store: SessionStore) -> str:
     parts = []
+    pending: list[tuple[str, pd.DataFrame]] = []
     for m in msg_types:
         cached = store.get_cached_context(session_id, m)
         if cached:
@@ -53,7 +211,17 @@ def build_context(tdata: TelemetryData, msg_types: set[str], session_id: str, st
         df = tdata.get_df(m)
         if df is None or df.empty:
             continue
-        summary = summarise_df(df)
+        pending.append((m, df))
+
+    # Summarise uncached types concurrently — each is an independent
+    # pandas/NumPy job that releases the GIL during the big reductions
+    if len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as ex:
+            summaries = list(ex.map(lambda md: _summarise_cached(md[0], md[1]), pending))
+    else:
+        summaries = [_summarise_cached(m, df) for m, df in pending]
+
+    for (m, df), summary in zip(pending, summaries):
         store.cache_context(session_id, m, summary)
         parts.append(f"### {m} ({len(df)} rows)\n{summary}")
     return "\n\n".join(parts) or "No relevant data found."